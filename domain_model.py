@@ -5,11 +5,47 @@ This module defines the core domain entities and value objects for
 processing and mapping allocation list data from Excel.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
 from datetime import date
-from typing import Optional, List
+from typing import Optional, List, Dict, Iterator, Tuple
 from enum import Enum
 
+import pandas as pd
+
+# Arrow-backed string columns; pyarrow is also a dependency of streamlit
+_STRING_DTYPE = pd.StringDtype("pyarrow")
+
+# AllocationColumns fields stored with _STRING_DTYPE
+_TEXT_FIELDS = frozenset({
+    "account_identifier", "full_name", "allocation_of_loss_reason",
+    "time_frame", "managing_officer"
+})
+
+
+# Spellings accepted as YES by the yes_no_to_boolean transformation
+_YES_TOKENS = frozenset({
+    "YES", "Yes", "yes", "Y", "y", "TRUE", "True", "true", "1"
+})
+
+
+# Business rules for an allocation record as (field, check, message).
+# "missing" fails on a missing value; "blank" also fails on whitespace-only
+# text. AllocationRecord.validate and AllocationColumns.invalid_mask both
+# apply this table, so a rule added here is enforced by both.
+_VALIDATION_RULES = (
+    ("full_name", "blank", "Full name cannot be empty"),
+    ("balance", "missing", "Balance must be provided"),
+    ("time_frame", "blank", "Time frame must be specified"),
+)
+
+
+# Target columns a ColumnMapping may map to
+_VALID_TARGETS = frozenset({
+    "EFFECTIVE_DATE", "ACCOUNT_IDENTIFIER", "FULL_NAME",
+    "BALANCE", "FRAUD_WARNING", "ADMIN_HOLD",
+    "ALLOCATION_OF_LOSS_REASON", "TIME_FRAME", "MANAGING_OFFICER"
+})
+
 
 # ============================================================================
 # VALUE OBJECTS
@@ -25,7 +61,7 @@ class YesNoIndicator(Enum):
         return self == YesNoIndicator.YES
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SourceColumnName:
     """Value object representing a column name from source Excel"""
     value: str
@@ -35,7 +71,7 @@ class SourceColumnName:
             raise ValueError("Column name must be a non-empty string")
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AccountIdentifier:
     """Value object for account identifier with validation"""
     value: str
@@ -49,7 +85,7 @@ class AccountIdentifier:
 # ENTITIES
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class AllocationRecord:
     """
     Core domain entity representing a single allocation record.
@@ -70,19 +106,95 @@ class AllocationRecord:
         """Validate business rules for an allocation record"""
         errors = []
 
-        if not self.full_name or not self.full_name.strip():
-            errors.append("Full name cannot be empty")
+        for name, check, message in _VALIDATION_RULES:
+            value = getattr(self, name)
+            if value is None or (check == "blank" and not value.strip()):
+                errors.append(message)
 
-        if self.balance is None:
-            errors.append("Balance must be provided")
+        return errors
 
-        if not self.time_frame or not self.time_frame.strip():
-            errors.append("Time frame must be specified")
+
+@dataclass(slots=True)
+class AllocationColumns:
+    """
+    Column-oriented (structure-of-arrays) form of many AllocationRecords.
+    Bulk processing works on one Series per field; individual
+    AllocationRecords are only materialized on demand.
+    """
+    effective_date: date
+    account_identifier: pd.Series  # string, NA when missing or blank
+    full_name: pd.Series
+    balance: pd.Series  # float64, NaN when missing or not a number
+    fraud_warning: pd.Series
+    admin_hold: pd.Series
+    allocation_of_loss_reason: pd.Series
+    time_frame: pd.Series
+    managing_officer: pd.Series
+
+    def __len__(self) -> int:
+        return len(self.account_identifier)
+
+    @staticmethod
+    def _is_blank(values: pd.Series) -> pd.Series:
+        return values.str.strip().eq("").fillna(True).astype(bool)
+
+    def invalid_mask(self) -> pd.Series:
+        """Vectorized business rules: True where a row fails AllocationRecord.validate"""
+        mask = self.account_identifier.isna()
+        for name, check, _ in _VALIDATION_RULES:
+            values = getattr(self, name)
+            mask |= self._is_blank(values) if check == "blank" else values.isna()
+        return mask
+
+    def _records_at(self, positions) -> Iterator[Tuple[int, Dict]]:
+        """Yield (position, field values) for the given row positions"""
+        subset = pd.DataFrame({
+            f.name: getattr(self, f.name).iloc[positions]
+            for f in fields(self)[1:]
+        })
+        # itertuples yields plain Python scalars straight from the column arrays
+        for pos, row in zip(positions, subset.itertuples(index=False)):
+            yield int(pos), {
+                name: None if pd.isna(value) else value
+                for name, value in row._asdict().items()
+            }
+
+    def _to_record(self, values: Dict) -> AllocationRecord:
+        values = dict(values)
+        account = values.pop("account_identifier")
+        return AllocationRecord(
+            effective_date=self.effective_date,
+            account_identifier=AccountIdentifier(account),
+            **values
+        )
+
+    def validate(self) -> Dict[int, List[str]]:
+        """Validate business rules, returning errors keyed by row position"""
+        errors = {}
+
+        # Only rows flagged by the masks are visited in Python
+        failing = self.invalid_mask().to_numpy().nonzero()[0]
+        for pos, values in self._records_at(failing):
+            try:
+                errors[pos] = self._to_record(values).validate()
+            except Exception as e:
+                errors[pos] = [f"Failed to transform - {e}"]
 
         return errors
 
+    def to_frame(self) -> pd.DataFrame:
+        """Build a DataFrame with target table column names"""
+        data = {
+            "EFFECTIVE_DATE": pd.Series(
+                self.effective_date, index=self.account_identifier.index, dtype=object
+            )
+        }
+        for f in fields(self)[1:]:
+            data[f.name.upper()] = getattr(self, f.name)
+        return pd.DataFrame(data)
+
 
-@dataclass
+@dataclass(slots=True)
 class SourceSpreadsheet:
     """
     Represents the uploaded Excel file with its specific structure.
@@ -92,16 +204,20 @@ class SourceSpreadsheet:
     effective_date: date  # Row 1, Column 0
     header_row: List[str]  # Row 2
     data_rows: List[List]  # Row 3+
+    header_index: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # First occurrence wins, matching list.index semantics
+        self.header_index = {}
+        for idx, name in enumerate(self.header_row):
+            self.header_index.setdefault(name, idx)
 
     def get_column_index(self, column_name: str) -> Optional[int]:
         """Find the index of a column by name"""
-        try:
-            return self.header_row.index(column_name)
-        except ValueError:
-            return None
+        return self.header_index.get(column_name)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ColumnMapping:
     """
     Maps source Excel column names to target table columns.
@@ -112,16 +228,11 @@ class ColumnMapping:
     transformation: Optional[str] = None  # e.g., "yes_no_to_boolean"
 
     def __post_init__(self):
-        valid_targets = {
-            "EFFECTIVE_DATE", "ACCOUNT_IDENTIFIER", "FULL_NAME",
-            "BALANCE", "FRAUD_WARNING", "ADMIN_HOLD",
-            "ALLOCATION_OF_LOSS_REASON", "TIME_FRAME", "MANAGING_OFFICER"
-        }
-        if self.target_column not in valid_targets:
+        if self.target_column not in _VALID_TARGETS:
             raise ValueError(f"Invalid target column: {self.target_column}")
 
 
-@dataclass
+@dataclass(slots=True)
 class TableSchema:
     """
     Represents the target table structure.
@@ -148,6 +259,45 @@ class TableSchema:
 # DOMAIN SERVICES
 # ============================================================================
 
+# Standard mapping configuration, built once at import
+_DEFAULT_MAPPINGS = (
+    ColumnMapping(
+        source_column=SourceColumnName("Account Identifier"),
+        target_column="ACCOUNT_IDENTIFIER"
+    ),
+    ColumnMapping(
+        source_column=SourceColumnName("Full Name"),
+        target_column="FULL_NAME"
+    ),
+    ColumnMapping(
+        source_column=SourceColumnName("Balance"),
+        target_column="BALANCE"
+    ),
+    ColumnMapping(
+        source_column=SourceColumnName("Fraud Warning - Desc"),
+        target_column="FRAUD_WARNING",
+        transformation="yes_no_to_boolean"
+    ),
+    ColumnMapping(
+        source_column=SourceColumnName("Admin Hold - Desc"),
+        target_column="ADMIN_HOLD",
+        transformation="yes_no_to_boolean"
+    ),
+    ColumnMapping(
+        source_column=SourceColumnName("Charge Off Reason Code - Desc"),
+        target_column="ALLOCATION_OF_LOSS_REASON"
+    ),
+    ColumnMapping(
+        source_column=SourceColumnName("Charge Off Group - Desc"),
+        target_column="TIME_FRAME"
+    ),
+    ColumnMapping(
+        source_column=SourceColumnName("Managing Officer - Desc"),
+        target_column="MANAGING_OFFICER"
+    ),
+)
+
+
 class MappingService:
     """
     Domain service for creating standard column mappings.
@@ -157,42 +307,7 @@ class MappingService:
     @staticmethod
     def get_default_mappings() -> List[ColumnMapping]:
         """Returns the standard mapping configuration"""
-        return [
-            ColumnMapping(
-                source_column=SourceColumnName("Account Identifier"),
-                target_column="ACCOUNT_IDENTIFIER"
-            ),
-            ColumnMapping(
-                source_column=SourceColumnName("Full Name"),
-                target_column="FULL_NAME"
-            ),
-            ColumnMapping(
-                source_column=SourceColumnName("Balance"),
-                target_column="BALANCE"
-            ),
-            ColumnMapping(
-                source_column=SourceColumnName("Fraud Warning - Desc"),
-                target_column="FRAUD_WARNING",
-                transformation="yes_no_to_boolean"
-            ),
-            ColumnMapping(
-                source_column=SourceColumnName("Admin Hold - Desc"),
-                target_column="ADMIN_HOLD",
-                transformation="yes_no_to_boolean"
-            ),
-            ColumnMapping(
-                source_column=SourceColumnName("Charge Off Reason Code - Desc"),
-                target_column="ALLOCATION_OF_LOSS_REASON"
-            ),
-            ColumnMapping(
-                source_column=SourceColumnName("Charge Off Group - Desc"),
-                target_column="TIME_FRAME"
-            ),
-            ColumnMapping(
-                source_column=SourceColumnName("Managing Officer - Desc"),
-                target_column="MANAGING_OFFICER"
-            ),
-        ]
+        return list(_DEFAULT_MAPPINGS)
 
 
 class RecordTransformationService:
@@ -201,43 +316,101 @@ class RecordTransformationService:
     Implements the anti-corruption layer between source and domain model.
     """
 
+    @staticmethod
+    def resolve_mappings(
+        source_spreadsheet: SourceSpreadsheet,
+        mappings: List[ColumnMapping]
+    ) -> List[Tuple[Optional[int], str, Optional[str]]]:
+        """Resolve mappings to (column index, field name, transformation) once per run"""
+        return [
+            (
+                source_spreadsheet.get_column_index(mapping.source_column.value),
+                mapping.target_column.lower(),
+                mapping.transformation
+            )
+            for mapping in mappings
+        ]
+
     @staticmethod
     def transform_row(
         effective_date: date,
         source_row: List,
-        source_spreadsheet: SourceSpreadsheet,
-        mappings: List[ColumnMapping]
+        resolved_mappings: List[Tuple[Optional[int], str, Optional[str]]]
     ) -> AllocationRecord:
-        """Transform a source row into an AllocationRecord"""
+        """
+        Transform a source row into an AllocationRecord.
+        Row-wise counterpart of transform_columns, which the app uses for bulk
+        processing; transformations added there must be mirrored here by hand.
+        """
+        record_data = {"effective_date": effective_date}
+        row_len = len(source_row)
 
-        # Helper function to get value from source row
-        def get_value(source_col_name: str):
-            idx = source_spreadsheet.get_column_index(source_col_name)
-            if idx is None or idx >= len(source_row):
-                return None
-            return source_row[idx]
+        for idx, field_name, transformation in resolved_mappings:
+            value = source_row[idx] if idx is not None and idx < row_len else None
 
-        # Helper function to apply transformation
-        def apply_transformation(value, transformation: Optional[str]):
             if transformation == "yes_no_to_boolean":
                 if isinstance(value, str):
-                    return value.upper() == "YES"
-                return bool(value)
-            return value
+                    value = value in _YES_TOKENS
+                else:
+                    value = bool(value)
 
-        # Build the record using mappings
-        record_data = {"effective_date": effective_date}
+            if field_name == "account_identifier":
+                record_data[field_name] = AccountIdentifier(str(value))
+            else:
+                record_data[field_name] = value
 
-        for mapping in mappings:
-            value = get_value(mapping.source_column.value)
-            transformed_value = apply_transformation(value, mapping.transformation)
+        return AllocationRecord(**record_data)
 
-            # Map to domain model field name (lowercase with underscores)
-            field_name = mapping.target_column.lower()
+    @staticmethod
+    def yes_no_to_boolean(values: pd.Series) -> pd.Series:
+        """Column-wise equivalent of the YES/NO transformation in transform_row"""
+        if not (values.dtype == object or pd.api.types.is_string_dtype(values)):
+            return values.fillna(0).astype(bool)
 
-            if field_name == "account_identifier":
-                record_data[field_name] = AccountIdentifier(str(transformed_value))
+        is_yes = values.isin(_YES_TOKENS)
+        if pd.api.types.infer_dtype(values, skipna=True) == "string":
+            return is_yes
+
+        # Not the .str accessor: it rejects object columns without any strings
+        is_text = values.map(lambda v: isinstance(v, str)).astype(bool)
+        truthy = pd.to_numeric(values.where(~is_text), errors="coerce")
+        return is_yes | truthy.fillna(0).astype(bool)
+
+    @staticmethod
+    def transform_columns(
+        effective_date: date,
+        source_rows: List[List],
+        resolved_mappings: List[Tuple[Optional[int], str, Optional[str]]]
+    ) -> AllocationColumns:
+        """Transform source rows into AllocationColumns using column operations"""
+        # Object columns keep cell values as read; inference would turn an
+        # int column with a blank into float64 and 10001 into "10001.0"
+        raw = pd.DataFrame(source_rows, dtype=object)
+        columns = {}
+
+        for idx, field_name, transformation in resolved_mappings:
+            if idx is not None and idx in raw.columns:
+                values = raw[idx]
             else:
-                record_data[field_name] = transformed_value
+                values = pd.Series(None, index=raw.index, dtype=object)
+
+            if transformation == "yes_no_to_boolean":
+                values = RecordTransformationService.yes_no_to_boolean(values)
+
+            if field_name == "balance":
+                # Always a float64 buffer, even when every balance is whole
+                values = pd.to_numeric(values, errors="coerce").astype("float64")
+
+            columns[field_name] = values
+
+        for f in fields(AllocationColumns)[1:]:
+            columns.setdefault(f.name, pd.Series(None, index=raw.index, dtype=object))
+
+        # Text as contiguous string arrays rather than boxed Python objects
+        for name in _TEXT_FIELDS:
+            columns[name] = columns[name].astype(_STRING_DTYPE)
+
+        account = columns["account_identifier"]
+        columns["account_identifier"] = account.mask(account.eq("").fillna(False))
 
-        return AllocationRecord(**record_data)
\ No newline at end of file
+        return AllocationColumns(effective_date=effective_date, **columns)
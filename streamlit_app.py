@@ -5,16 +5,18 @@ This application uploads Excel spreadsheets containing allocation data,
 maps columns, validates the data, and provides export options.
 """
 
+import hashlib
 import streamlit as st
 import pandas as pd
-from datetime import datetime, date
-from typing import List, Tuple, Optional
+from datetime import datetime, date, time
+from typing import BinaryIO, Iterator, List, Tuple, Optional, Union
 import openpyxl
 from io import BytesIO
+from contextlib import closing
 
 # Import domain model
 from domain_model import (
-    AllocationRecord, SourceSpreadsheet, ColumnMapping,
+    AllocationRecord, AllocationColumns, SourceSpreadsheet, ColumnMapping,
     TableSchema, MappingService, RecordTransformationService,
     SourceColumnName, AccountIdentifier
 )
@@ -26,6 +28,20 @@ try:
 except ImportError:
     SNOWFLAKE_AVAILABLE = False
 
+# Native (Rust) Excel reader (optional, falls back to openpyxl)
+try:
+    from python_calamine import CalamineWorkbook
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
+# C-backed Excel writer (optional, falls back to openpyxl)
+try:
+    import xlsxwriter  # noqa: F401
+    _EXCEL_ENGINE = "xlsxwriter"
+except ImportError:
+    _EXCEL_ENGINE = "openpyxl"
+
 
 # ============================================================================
 # APPLICATION LAYER - Orchestrates domain logic
@@ -34,38 +50,114 @@ except ImportError:
 class AllocationListProcessor:
     """Application service that orchestrates the processing"""
 
+    FIRST_DATA_ROW = 4  # Spreadsheet row number of data row 1
+    MAX_REPORTED_ROWS = 20  # Row numbers listed per error summary
+
     def __init__(self):
         self.table_schema = TableSchema()
         self.mapping_service = MappingService()
         self.transformation_service = RecordTransformationService()
 
-    def parse_excel_file(self, file_bytes: bytes) -> SourceSpreadsheet:
-        """Parse uploaded Excel file into domain model"""
-        workbook = openpyxl.load_workbook(BytesIO(file_bytes))
-        sheet = workbook.active
-
-        # Read all rows
-        rows = list(sheet.iter_rows(values_only=True))
-
-        # Extract structured data
-        title_row = str(rows[0][0]) if rows[0][0] else ""
-
-        # Parse effective date from row 1, column 0
-        effective_date_value = rows[1][0]
-        if isinstance(effective_date_value, datetime):
-            effective_date = effective_date_value.date()
-        elif isinstance(effective_date_value, date):
-            effective_date = effective_date_value
-        elif isinstance(effective_date_value, str):
-            # Try parsing ISO format
-            effective_date = datetime.fromisoformat(
-                effective_date_value.replace('Z', '+00:00')
-            ).date()
+    @staticmethod
+    def _read_rows_calamine(file: BinaryIO) -> Iterator[list]:
+        """
+        Stream cell values of a single-sheet workbook with python-calamine.
+        Calamine cannot tell which tab is active, so workbooks with several
+        sheets are handed to openpyxl, which reads workbook.active.
+        """
+        workbook = CalamineWorkbook.from_filelike(file)
+        try:
+            if len(workbook.sheet_names) > 1:
+                file.seek(0)
+                yield from AllocationListProcessor._read_rows_openpyxl(file)
+                return
+
+            sheet = workbook.get_sheet_by_index(0)
+
+            # Calamine reports empty cells as "", every number as float and
+            # date-formatted cells as date; map these to openpyxl's None, int
+            # and datetime. Calamine also reads whitespace-only text as "",
+            # so such cells become None here where openpyxl keeps the text.
+            for row in sheet.iter_rows():
+                yield [
+                    None if cell == "" else
+                    int(cell) if isinstance(cell, float) and cell.is_integer() else
+                    datetime.combine(cell, time()) if type(cell) is date else
+                    cell
+                    for cell in row
+                ]
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _read_rows_openpyxl(file: BinaryIO) -> Iterator[list]:
+        """Stream cell values of the active sheet with openpyxl"""
+        workbook = openpyxl.load_workbook(
+            file,
+            read_only=True,
+            data_only=True,
+            keep_links=False
+        )
+        try:
+            sheet = workbook.active
+
+            # Some producers write a stale "A1:A1" dimension, which would
+            # truncate read-only iteration to the first cell
+            if sheet.max_row == 1 and sheet.max_column == 1:
+                sheet.reset_dimensions()
+
+            for row in sheet.iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
+
+    def parse_excel_file(self, file: Union[bytes, BinaryIO]) -> SourceSpreadsheet:
+        """
+        Parse uploaded Excel file into domain model.
+        Accepts raw bytes or a seekable file object, which is read in place.
+        """
+        if isinstance(file, bytes):
+            file = BytesIO(file)
+        else:
+            file.seek(0)
+
+        # Stream rows in a single pass
+        if CALAMINE_AVAILABLE:
+            rows = self._read_rows_calamine(file)
         else:
-            raise ValueError(f"Cannot parse effective date: {effective_date_value}")
+            rows = self._read_rows_openpyxl(file)
+
+        # Closing the generator releases the workbook even if parsing fails
+        with closing(rows):
+            try:
+                title_cells = next(rows)
+                effective_date_cells = next(rows)
+                header_cells = next(rows)
+            except StopIteration:
+                raise ValueError("File must contain title, effective date and header rows")
+
+            # Extract structured data
+            title_row = str(title_cells[0]) if title_cells[0] else ""
+
+            # Parse effective date from row 1, column 0
+            effective_date_value = effective_date_cells[0]
+            if isinstance(effective_date_value, datetime):
+                effective_date = effective_date_value.date()
+            elif isinstance(effective_date_value, date):
+                effective_date = effective_date_value
+            elif isinstance(effective_date_value, str):
+                # Try parsing ISO format
+                effective_date = datetime.fromisoformat(
+                    effective_date_value.replace('Z', '+00:00')
+                ).date()
+            else:
+                raise ValueError(f"Cannot parse effective date: {effective_date_value}")
 
-        header_row = [str(cell) if cell else "" for cell in rows[2]]
-        data_rows = [list(row) for row in rows[3:] if any(row)]  # Skip empty rows
+            header_row = [str(cell) if cell else "" for cell in header_cells]
+            data_rows = [
+                row for row in rows
+                if any(cell is not None for cell in row)  # Skip empty rows
+            ]
 
         return SourceSpreadsheet(
             title_row=title_row,
@@ -74,102 +166,111 @@ class AllocationListProcessor:
             data_rows=data_rows
         )
 
+    def transform_data(
+        self,
+        source: SourceSpreadsheet,
+        mappings: List[ColumnMapping],
+        max_rows: Optional[int] = None
+    ) -> AllocationColumns:
+        """Transform source rows into the target schema with column operations"""
+        resolved = self.transformation_service.resolve_mappings(source, mappings)
+        rows = source.data_rows if max_rows is None else source.data_rows[:max_rows]
+        return self.transformation_service.transform_columns(
+            effective_date=source.effective_date,
+            source_rows=rows,
+            resolved_mappings=resolved
+        )
+
     def preview_data(
         self,
         source: SourceSpreadsheet,
         mappings: List[ColumnMapping],
-        max_rows: int = 10
+        max_rows: int = 10,
+        columns: Optional[AllocationColumns] = None
     ) -> pd.DataFrame:
-        """Create a preview DataFrame showing mapped data"""
-        records = []
-
-        for row in source.data_rows[:max_rows]:
-            try:
-                record = self.transformation_service.transform_row(
-                    effective_date=source.effective_date,
-                    source_row=row,
-                    source_spreadsheet=source,
-                    mappings=mappings
-                )
-
-                records.append({
-                    "EFFECTIVE_DATE": record.effective_date,
-                    "ACCOUNT_IDENTIFIER": record.account_identifier.value,
-                    "FULL_NAME": record.full_name,
-                    "BALANCE": record.balance,
-                    "FRAUD_WARNING": record.fraud_warning,
-                    "ADMIN_HOLD": record.admin_hold,
-                    "ALLOCATION_OF_LOSS_REASON": record.allocation_of_loss_reason,
-                    "TIME_FRAME": record.time_frame,
-                    "MANAGING_OFFICER": record.managing_officer
-                })
-            except Exception as e:
-                st.warning(f"Error processing row: {e}")
-
-        return pd.DataFrame(records)
+        """
+        Create a preview DataFrame showing mapped data.
+        With columns from transform_data the preview is a head slice of them;
+        otherwise only the first max_rows source rows are transformed.
+        """
+        if columns is None:
+            columns = self.transform_data(source, mappings, max_rows=max_rows)
+        return columns.to_frame().head(max_rows)
 
     def validate_records(
         self,
         source: SourceSpreadsheet,
-        mappings: List[ColumnMapping]
+        mappings: List[ColumnMapping],
+        columns: Optional[AllocationColumns] = None
     ) -> Tuple[int, List[str]]:
-        """Validate all records and return count and errors"""
-        errors = []
-        valid_count = 0
-
-        for idx, row in enumerate(source.data_rows, start=4):  # Start at row 4 (data row 1)
-            try:
-                record = self.transformation_service.transform_row(
-                    effective_date=source.effective_date,
-                    source_row=row,
-                    source_spreadsheet=source,
-                    mappings=mappings
-                )
-
-                record_errors = record.validate()
-                if record_errors:
-                    errors.extend([f"Row {idx}: {err}" for err in record_errors])
-                else:
-                    valid_count += 1
+        """
+        Validate all records and return count and errors.
+        Pass columns from transform_data to reuse an earlier transformation.
+        """
+        if columns is None:
+            columns = self.transform_data(source, mappings)
+        row_errors = columns.validate()
 
-            except Exception as e:
-                errors.append(f"Row {idx}: Failed to transform - {e}")
+        errors = []
+        for pos, record_errors in row_errors.items():
+            idx = pos + self.FIRST_DATA_ROW
+            errors.extend([f"Row {idx}: {err}" for err in record_errors])
 
+        valid_count = len(columns) - len(row_errors)
         return valid_count, errors
 
     def process_all_data(
         self,
         source: SourceSpreadsheet,
-        mappings: List[ColumnMapping]
+        mappings: List[ColumnMapping],
+        columns: Optional[AllocationColumns] = None
     ) -> pd.DataFrame:
-        """Process all data and return as DataFrame"""
-        records_data = []
-
-        for row in source.data_rows:
-            try:
-                record = self.transformation_service.transform_row(
-                    effective_date=source.effective_date,
-                    source_row=row,
-                    source_spreadsheet=source,
-                    mappings=mappings
-                )
-
-                records_data.append({
-                    "EFFECTIVE_DATE": record.effective_date,
-                    "ACCOUNT_IDENTIFIER": record.account_identifier.value,
-                    "FULL_NAME": record.full_name,
-                    "BALANCE": float(record.balance) if record.balance else None,
-                    "FRAUD_WARNING": record.fraud_warning,
-                    "ADMIN_HOLD": record.admin_hold,
-                    "ALLOCATION_OF_LOSS_REASON": record.allocation_of_loss_reason,
-                    "TIME_FRAME": record.time_frame,
-                    "MANAGING_OFFICER": record.managing_officer
-                })
-            except Exception as e:
-                st.error(f"Error processing row: {e}")
-                continue
-
-        return pd.DataFrame(records_data)
+        """
+        Process all data and return as DataFrame.
+        Pass columns from transform_data to reuse an earlier transformation.
+        """
+        if columns is None:
+            columns = self.transform_data(source, mappings)
+        df = columns.to_frame()
+
+        # Errors are reported once from masks rather than per row
+        missing_account = columns.account_identifier.isna()
+        missing_balance = columns.balance.isna() & ~missing_account
+        failing_rules = columns.invalid_mask() & ~missing_account
+
+        if missing_account.any():
+            st.error(
+                f"Skipped {int(missing_account.sum())} rows without an account "
+                "identifier; they are not exported or inserted: "
+                f"{self._describe_rows(missing_account)}"
+            )
+            df = df[~missing_account].reset_index(drop=True)
+
+        if missing_balance.any():
+            st.warning(
+                f"{int(missing_balance.sum())} rows have a missing or non-numeric "
+                "balance; they are exported with an empty BALANCE (NULL in Snowflake): "
+                f"{self._describe_rows(missing_balance)}"
+            )
+
+        if failing_rules.any():
+            st.warning(
+                f"{int(failing_rules.sum())} processed rows fail validation rules: "
+                f"{self._describe_rows(failing_rules)}"
+            )
+
+        return df
+
+    def _describe_rows(self, mask: pd.Series) -> str:
+        """Summarize the spreadsheet rows selected by a mask"""
+        positions = mask.to_numpy().nonzero()[0]
+        shown = ", ".join(
+            str(pos + self.FIRST_DATA_ROW)
+            for pos in positions[:self.MAX_REPORTED_ROWS]
+        )
+        if len(positions) > self.MAX_REPORTED_ROWS:
+            shown += f" ... and {len(positions) - self.MAX_REPORTED_ROWS} more"
+        return f"rows {shown}"
 
 
 # ============================================================================
@@ -178,17 +279,101 @@ class AllocationListProcessor:
 
 def to_csv(df: pd.DataFrame) -> bytes:
     """Convert DataFrame to CSV bytes"""
-    return df.to_csv(index=False).encode('utf-8')
+    # Written straight into a binary buffer, so no intermediate str is built
+    output = BytesIO()
+    df.to_csv(output, index=False, encoding='utf-8')
+    return output.getvalue()
 
 
 def to_excel(df: pd.DataFrame) -> bytes:
     """Convert DataFrame to Excel bytes"""
     output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+    with pd.ExcelWriter(output, engine=_EXCEL_ENGINE) as writer:
         df.to_excel(writer, index=False, sheet_name='SC_Allocation_List')
     return output.getvalue()
 
 
+def mapping_signature(mappings: List[ColumnMapping]) -> Tuple:
+    """Hashable signature of a mapping configuration, used as a cache key"""
+    return tuple(
+        (m.source_column.value, m.target_column, m.transformation)
+        for m in mappings
+    )
+
+
+# ============================================================================
+# CACHED OPERATIONS - Reused across Streamlit reruns
+# ============================================================================
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _parse_excel_file(file_key: str, _file: BinaryIO) -> SourceSpreadsheet:
+    """Parse an uploaded file once per unique upload, keyed on its content hash"""
+    return AllocationListProcessor().parse_excel_file(_file)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _transform_data(
+    file_key: str,
+    mappings_sig: Tuple,
+    _file: BinaryIO,
+    _mappings: List[ColumnMapping]
+) -> AllocationColumns:
+    """Transform every row once per file and mapping; shared by validation and processing"""
+    source = _parse_excel_file(file_key, _file)
+    return AllocationListProcessor().transform_data(source, _mappings)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _preview_data(
+    file_key: str,
+    mappings_sig: Tuple,
+    _file: BinaryIO,
+    _mappings: List[ColumnMapping]
+) -> pd.DataFrame:
+    """Cached preview: a head slice of the shared transformation"""
+    source = _parse_excel_file(file_key, _file)
+    columns = _transform_data(file_key, mappings_sig, _file, _mappings)
+    return AllocationListProcessor().preview_data(source, _mappings, columns=columns)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _validate_records(
+    file_key: str,
+    mappings_sig: Tuple,
+    _file: BinaryIO,
+    _mappings: List[ColumnMapping]
+) -> Tuple[int, List[str]]:
+    """Cached validation keyed on file hash and mapping signature"""
+    source = _parse_excel_file(file_key, _file)
+    columns = _transform_data(file_key, mappings_sig, _file, _mappings)
+    return AllocationListProcessor().validate_records(source, _mappings, columns=columns)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _process_all_data(
+    file_key: str,
+    mappings_sig: Tuple,
+    _file: BinaryIO,
+    _mappings: List[ColumnMapping]
+) -> pd.DataFrame:
+    """Cached full processing keyed on file hash and mapping signature"""
+    source = _parse_excel_file(file_key, _file)
+    columns = _transform_data(file_key, mappings_sig, _file, _mappings)
+    return AllocationListProcessor().process_all_data(source, _mappings, columns=columns)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _encode_csv(file_key: str, mappings_sig: Tuple, _df: pd.DataFrame) -> bytes:
+    """CSV export keyed on file hash and mapping signature, not the DataFrame"""
+    return to_csv(_df)
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _encode_excel(file_key: str, mappings_sig: Tuple, _df: pd.DataFrame) -> bytes:
+    """Excel export keyed on file hash and mapping signature, not the DataFrame"""
+    return to_excel(_df)
+
+
 @st.cache_resource
 def get_snowflake_connection():
     """
@@ -235,8 +420,9 @@ def insert_to_snowflake(df: pd.DataFrame, conn, table_name: str) -> int:
             VALUES ({placeholders})
         """
 
-        # Convert DataFrame to list of tuples
-        data = [tuple(row) for row in df.values]
+        # Convert DataFrame to list of tuples, with NA/NaN bound as NULL
+        values = df.astype(object).where(df.notna(), None)
+        data = [tuple(row) for row in values.values]
 
         # Execute batch insert
         cursor.executemany(insert_sql, data)
@@ -282,8 +468,11 @@ def main():
     if uploaded_file is not None:
         try:
             # Parse file
-            file_bytes = uploaded_file.read()
-            source = processor.parse_excel_file(file_bytes)
+            # The hash is the cache key; parsing reads the upload in place
+            file_key = hashlib.blake2b(
+                uploaded_file.getvalue(), digest_size=16
+            ).hexdigest()
+            source = _parse_excel_file(file_key, uploaded_file)
 
             # Display file info
             st.success("✅ File uploaded successfully!")
@@ -299,6 +488,7 @@ def main():
             st.header("2️⃣ Column Mapping")
 
             default_mappings = processor.mapping_service.get_default_mappings()
+            mappings_sig = mapping_signature(default_mappings)
 
             st.info("💡 Using default column mappings. Verify the mapping below:")
 
@@ -318,7 +508,9 @@ def main():
             st.header("3️⃣ Data Preview")
 
             with st.spinner("Generating preview..."):
-                preview_df = processor.preview_data(source, default_mappings)
+                preview_df = _preview_data(
+                    file_key, mappings_sig, uploaded_file, default_mappings
+                )
                 st.dataframe(
                     preview_df,
                     use_container_width=True,
@@ -330,8 +522,10 @@ def main():
 
             if st.button("🔍 Validate Data", type="secondary"):
                 with st.spinner("Validating records..."):
-                    valid_count, errors = processor.validate_records(
-                        source,
+                    valid_count, errors = _validate_records(
+                        file_key,
+                        mappings_sig,
+                        uploaded_file,
                         default_mappings
                     )
 
@@ -356,11 +550,19 @@ def main():
                     type="primary"
                 )
 
+            processed_key = (file_key, mappings_sig)
             if process_button:
+                st.session_state["processed_key"] = processed_key
+
+            # Keep showing results on later reruns (download or insert clicks);
+            # _process_all_data is cached, so this does not reprocess
+            if st.session_state.get("processed_key") == processed_key:
                 with st.spinner("Processing data..."):
                     try:
-                        processed_df = processor.process_all_data(
-                            source,
+                        processed_df = _process_all_data(
+                            file_key,
+                            mappings_sig,
+                            uploaded_file,
                             default_mappings
                         )
 
@@ -380,7 +582,7 @@ def main():
                         col1, col2 = st.columns(2)
 
                         with col1:
-                            csv_data = to_csv(processed_df)
+                            csv_data = _encode_csv(file_key, mappings_sig, processed_df)
                             st.download_button(
                                 label="📄 Download as CSV",
                                 data=csv_data,
@@ -390,7 +592,7 @@ def main():
                             )
 
                         with col2:
-                            excel_data = to_excel(processed_df)
+                            excel_data = _encode_excel(file_key, mappings_sig, processed_df)
                             st.download_button(
                                 label="📊 Download as Excel",
                                 data=excel_data,